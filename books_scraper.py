@@ -2,31 +2,42 @@
 """
 Simple scraper that downloads https://books.toscrape.com, extracts
 book titles, prices and star ratings from the homepage and saves the
-results to `books.csv` using pandas.
+results to `books.csv` using the csv module.
 
-Requires: requests, beautifulsoup4, pandas
+Requires: requests, selectolax
 Usage: python books_scraper.py
 """
 
+import csv
 import re
 import sys
 
 import requests
-import pandas as pd
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from selectolax.lexbor import LexborHTMLParser
 
 BASE_URL = "https://books.toscrape.com"
 TIMEOUT = 10
 HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; BooksScraper/1.0)"}
 
+# Shared session so every request reuses the same keep-alive connection
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                                      max_retries=Retry(total=3, backoff_factor=0.5)))
+
 # Map textual star rating to numeric value
 RATING_MAP = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
 
+# Anything that is not part of the number, e.g. the currency symbol
+PRICE_RE = re.compile(r"[^0-9.]")
+
 
 def parse_price(price_text: str) -> float:
     """Convert price string like 'Â£51.77' or '£51.77' to float 51.77."""
     # Remove any non-digit / non-dot characters and convert to float
-    cleaned = re.sub(r"[^0-9.]", "", price_text)
+    cleaned = PRICE_RE.sub("", price_text)
     try:
         return float(cleaned)
     except ValueError:
@@ -35,55 +46,52 @@ def parse_price(price_text: str) -> float:
 
 def parse_rating(classes) -> int:
     """Find the textual rating in a list of classes and map to integer."""
-    for cls in classes:
-        if cls and cls != "star-rating":
-            # Normalize capitalization just in case
-            text = cls.capitalize()
-            if text in RATING_MAP:
-                return RATING_MAP[text]
-    return 0
+    # classes look like ["star-rating", "Three"]
+    return next((RATING_MAP[cls] for cls in classes if cls in RATING_MAP), 0)
 
 
 def scrape_homepage(url: str = BASE_URL):
     """Download the homepage and extract title, price and rating for each book."""
     try:
         # Download the page
-        resp = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
+        resp = SESSION.get(url, timeout=TIMEOUT)
         resp.raise_for_status()
     except requests.RequestException as e:
         print(f"Error fetching {url}: {e}")
         sys.exit(1)
 
-    # Parse the HTML content with BeautifulSoup
-    soup = BeautifulSoup(resp.content, "html.parser")
+    # Parse the HTML content with selectolax
+    tree = LexborHTMLParser(resp.content)
 
     # Find all books on the page (each book is an <article class="product_pod">)
-    articles = soup.find_all("article", class_="product_pod")
+    articles = tree.css("article.product_pod")
 
     rows = []
 
     for art in articles:
         # Extract the title from the <a> tag's title attribute
-        a = art.find("h3").find("a")
-        title = a.get("title") or a.get_text(strip=True)
+        a = art.css_first("h3 a")
+        title = a.attributes.get("title") or a.text(strip=True)
 
         # Extract the price from the <p class="price_color"> tag
-        price_tag = art.find("p", class_="price_color")
-        price_text = price_tag.get_text(strip=True) if price_tag else ""
+        price_tag = art.css_first("p.price_color")
+        price_text = price_tag.text(strip=True) if price_tag else ""
         price = parse_price(price_text)
 
         # Extract the rating from the <p class="star-rating ..."> classes
-        rating_tag = art.find("p", class_="star-rating")
-        rating = parse_rating(rating_tag.get("class", [])) if rating_tag else 0
+        rating_tag = art.css_first("p.star-rating")
+        rating = parse_rating((rating_tag.attributes.get("class") or "").split()) if rating_tag else 0
 
-        rows.append({"title": title, "price": price, "rating": rating})
+        rows.append((title, price, rating))
 
-    # Build a pandas DataFrame and save to CSV
-    df = pd.DataFrame(rows, columns=["title", "price", "rating"])
+    # Save to CSV, header first then all rows in one call
     output_file = "books.csv"
-    df.to_csv(output_file, index=False, encoding="utf-8")
+    with open(output_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(("title", "price", "rating"))
+        writer.writerows(rows)
 
-    print(f"Saved {len(df)} books to {output_file}")
+    print(f"Saved {len(rows)} books to {output_file}")
 
 
 if __name__ == "__main__":
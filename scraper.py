@@ -5,26 +5,38 @@ Simple scraper for http://books.toscrape.com
 Collects: title, price (float GBP), rating (1-5), number_of_reviews (int or -1),
 product_page_url, scraped_at (ISO UTC). Implements polite scraping (User-Agent,
 1s delay), retries (3 attempts), checkpointing to `checkpoint.json`, and
-appends page results to `products.csv` as it runs. After finishing the run the
-script deduplicates by product `title` and saves a cleaned `products.csv`.
+appends page results to `products.csv` as it runs. Products are deduplicated
+by `title` while crawling, including titles already present in `products.csv`
+from an earlier run, so the file never needs a cleanup pass.
+
+number_of_reviews is only read from the product pages when
+FETCH_PRODUCT_PAGES is set; otherwise it is written as 0, which is what
+books.toscrape.com shows for every book.
 
 Usage: python scraper.py
 
-Note: Requires `requests` and `beautifulsoup4`.
+Note: Requires `requests`, `beautifulsoup4` and `lxml`.
 """
 
 import csv
 import json
 import logging
 import os
+import socket
+import threading
 import time
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional
 from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
+from lxml import html as lxml_html
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
 
 BASE_URL = "http://books.toscrape.com/"
 CHECKPOINT = "checkpoint.json"
@@ -35,6 +47,16 @@ USER_AGENT = (
 REQUEST_TIMEOUT = 10
 RETRY_ATTEMPTS = 3
 POLITE_DELAY = 1.0  # seconds between requests
+POOL_MAXSIZE = 16  # keep-alive connections kept per host
+MAX_WORKERS = 8  # concurrent product page fetches
+CHECKPOINT_EVERY = 5  # pages between checkpoint writes
+# books.toscrape.com reports 0 reviews for every book, so by default the
+# product pages are not fetched and number_of_reviews is written as 0
+FETCH_PRODUCT_PAGES = False
+# urllib3's defaults (TCP_NODELAY) plus TCP keep-alive on pooled sockets
+SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
 
 RATING_MAP = {
     "One": 1,
@@ -44,25 +66,82 @@ RATING_MAP = {
     "Five": 5,
 }
 
+# Anything that is not part of the number, e.g. the currency symbol
+PRICE_RE = re.compile(r"[^0-9.]")
+
+# Only build the parts of a catalog page that scrape() reads: the product
+# articles and the pager's "next" item
+CATALOG_STRAINER = SoupStrainer(["article", "li"], class_=["product_pod", "next"])
+
+# Value cell of the "Number of reviews" row in the product information table
+REVIEWS_XPATH = etree.XPath(
+    "//table[contains(@class, 'table-striped')]"
+    "//tr[th[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'review')]]"
+    "/td/text()"
+)
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
 
+class RateLimiter:
+    """Space out calls to `wait` by at least `interval` seconds across threads.
+
+    Once `cancel` is called, current and later waits return False right away
+    until `reset` is called.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._last = 0.0
+        self._cancelled = threading.Event()
+
+    def wait(self) -> bool:
+        with self._lock:
+            if self._cancelled.is_set():
+                return False
+            delay = self._last + self.interval - time.monotonic()
+            if delay > 0 and self._cancelled.wait(delay):
+                return False
+            self._last = time.monotonic()
+        return True
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def reset(self):
+        self._cancelled.clear()
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled sockets use SOCKET_OPTIONS."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault("socket_options", SOCKET_OPTIONS)
+        super().init_poolmanager(*args, **kwargs)
+
+
+# shared by every retry_get call, so politeness holds across all worker threads
+rate_limiter = RateLimiter(POLITE_DELAY)
+
+
 def retry_get(session: requests.Session, url: str) -> Optional[requests.Response]:
     """GET with simple retry logic.
 
     Returns Response on success or None on failure after retries.
     """
     for attempt in range(1, RETRY_ATTEMPTS + 1):
+        # only sleeps if another request started less than POLITE_DELAY ago
+        if not rate_limiter.wait():
+            # the crawl is being stopped
+            return None
         try:
             resp = session.get(url, timeout=REQUEST_TIMEOUT)
             if resp.status_code == 200:
-                time.sleep(POLITE_DELAY)
                 return resp
             logging.warning("Non-200 status %s for %s (attempt %d)", resp.status_code, url, attempt)
         except requests.RequestException as e:
             logging.warning("Request error for %s: %s (attempt %d)", url, e, attempt)
-        if attempt < RETRY_ATTEMPTS:
-            time.sleep(POLITE_DELAY)
     logging.error("Failed to GET %s after %d attempts", url, RETRY_ATTEMPTS)
     return None
 
@@ -78,9 +157,12 @@ def load_checkpoint():
 
 
 def save_checkpoint(data: dict):
+    # write a temp file and swap it in so a crash never leaves a torn checkpoint
+    tmp_path = CHECKPOINT + ".tmp"
     try:
-        with open(CHECKPOINT, "w", encoding="utf-8") as fh:
-            json.dump(data, fh, ensure_ascii=False, indent=2)
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, CHECKPOINT)
     except Exception:
         logging.exception("Failed to write checkpoint")
 
@@ -88,14 +170,25 @@ def save_checkpoint(data: dict):
 def ensure_csv_header(path: str, fieldnames):
     if not os.path.exists(path):
         with open(path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
+            csv.writer(f).writerow(fieldnames)
+
+
+def load_seen_titles(path: str) -> set:
+    """Return the titles already written to `path` by a previous run."""
+    if not os.path.exists(path):
+        return set()
+    try:
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            return {row["title"] for row in csv.DictReader(f) if row.get("title")}
+    except Exception:
+        logging.exception("Failed to read existing titles from %s", path)
+        return set()
 
 
 def parse_price(price_str: str) -> float:
     # prices look like '£51.77' — strip currency symbol and convert
     try:
-        cleaned = re.sub(r"[^0-9.]", "", price_str)
+        cleaned = PRICE_RE.sub("", price_str)
         return float(cleaned) if cleaned else 0.0
     except Exception:
         logging.exception("Failed to parse price: %s", price_str)
@@ -104,48 +197,46 @@ def parse_price(price_str: str) -> float:
 
 def parse_rating(classes) -> int:
     # rating is encoded as class on a tag, e.g. 'star-rating Three'
-    try:
-        for cls in classes:
-            if not cls:
-                continue
-            key = cls.strip()
-            # normalize e.g. 'Three' or 'three'
-            if key in RATING_MAP:
-                return RATING_MAP[key]
-            k2 = key.capitalize()
-            if k2 in RATING_MAP:
-                return RATING_MAP[k2]
-    except Exception:
-        logging.exception("Error parsing rating classes: %s", classes)
-    return 0
+    return next((RATING_MAP[cls] for cls in classes if cls in RATING_MAP), 0)
 
 
-def extract_number_of_reviews(soup: BeautifulSoup) -> int:
+def extract_number_of_reviews(tree) -> int:
     # Try to find in product information table
     try:
-        table = soup.find("table", class_="table table-striped")
-        if table:
-            for row in table.find_all("tr"):
-                th = row.find("th")
-                td = row.find("td")
-                if not th or not td:
-                    continue
-                key = th.get_text(strip=True).lower()
-                if "review" in key:
-                    text = td.get_text(strip=True)
-                    try:
-                        return int(text)
-                    except ValueError:
-                        # sometimes it's not an int; return -1 then
-                        return -1
+        cells = REVIEWS_XPATH(tree)
+        if cells:
+            try:
+                return int(cells[0].strip())
+            except ValueError:
+                # sometimes it's not an int; return -1 then
+                return -1
     except Exception:
         logging.exception("Error extracting number of reviews")
     return -1
 
 
+def fetch_reviews(session: requests.Session, product_url: str) -> int:
+    """Fetch a product page and return its number of reviews (-1 if unknown)."""
+    prod_resp = retry_get(session, product_url)
+    if not prod_resp:
+        logging.warning("Could not retrieve product page: %s", product_url)
+        return -1
+    try:
+        prod_tree = lxml_html.fromstring(prod_resp.content)
+        return extract_number_of_reviews(prod_tree)
+    except Exception:
+        logging.exception("Failed to parse product page: %s", product_url)
+        return -1
+
+
 def scrape():
+    rate_limiter.reset()
     session = requests.Session()
     session.headers.update({"User-Agent": USER_AGENT})
+    # retries are handled by retry_get, the adapter only pools connections
+    adapter = KeepAliveAdapter(pool_maxsize=POOL_MAXSIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
 
     fieldnames = [
         "title",
@@ -155,124 +246,122 @@ def scrape():
         "product_page_url",
         "scraped_at",
     ]
+    seen_titles = load_seen_titles(OUT_CSV)
     ensure_csv_header(OUT_CSV, fieldnames)
 
     checkpoint = load_checkpoint()
     next_url = checkpoint.get("next_url") or BASE_URL
 
     page_count = 0
-    while next_url:
-        page_count += 1
-        logging.info("Processing page: %s", next_url)
-        resp = retry_get(session, next_url)
-        if resp is None:
-            logging.error("Skipping page due to repeated failures: %s", next_url)
-            break
-
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        product_articles = soup.select("article.product_pod")
-        if not product_articles:
-            logging.info("No products found on page: %s", next_url)
-
-        rows_to_write = []
-        for art in product_articles:
-            try:
-                h3 = art.find("h3")
-                a = h3.find("a")
-                title = a.get("title") or a.get_text(strip=True)
-                rel_link = a.get("href")
-                product_url = urljoin(next_url, rel_link)
-
-                price_tag = art.find("p", class_="price_color")
-                price = parse_price(price_tag.get_text()) if price_tag else 0.0
-
-                rating_tag = art.find("p", class_="star-rating")
-                rating = parse_rating(rating_tag.get("class", [])) if rating_tag else 0
-
-                # Try to get number_of_reviews from product page
-                num_reviews = -1
-                prod_resp = retry_get(session, product_url)
-                if prod_resp:
+    pages_since_checkpoint = 0
+    next_page = None  # prefetched response for next_url, if any
+    # the output file stays open in append mode for the whole crawl
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor, \
+            open(OUT_CSV, "a", newline="", encoding="utf-8") as out:
+        writer = csv.writer(out)
+        try:
+            while next_url:
+                page_count += 1
+                logging.info("Processing page: %s", next_url)
+                resp = next_page.result() if next_page else retry_get(session, next_url)
+                if resp is None:
+                    logging.error("Skipping page due to repeated failures: %s", next_url)
+                    # resume from this page next time
+                    save_checkpoint({"next_url": next_url})
+                    break
+
+                soup = BeautifulSoup(resp.content, "lxml", parse_only=CATALOG_STRAINER)
+
+                # Start downloading the next catalog page right away so it
+                # arrives while the product pages of this one are fetched
+                next_link = soup.select_one("li.next > a")
+                # next pages on this site are relative to the catalog path
+                following_url = urljoin(next_url, next_link.get("href")) if next_link else None
+                next_page = executor.submit(retry_get, session, following_url) if following_url else None
+
+                product_articles = soup.select("article.product_pod")
+                if not product_articles:
+                    logging.info("No products found on page: %s", next_url)
+
+                products = []
+                for art in product_articles:
                     try:
-                        prod_soup = BeautifulSoup(prod_resp.text, "html.parser")
-                        num_reviews = extract_number_of_reviews(prod_soup)
+                        h3 = art.find("h3")
+                        a = h3.find("a")
+                        title = a.get("title") or a.get_text(strip=True)
+                        if title in seen_titles:
+                            logging.info("Skipping duplicate product: %s", title)
+                            continue
+                        seen_titles.add(title)
+                        rel_link = a.get("href")
+                        product_url = urljoin(next_url, rel_link)
+
+                        price_tag = art.find("p", class_="price_color")
+                        price = parse_price(price_tag.get_text()) if price_tag else 0.0
+
+                        rating_tag = art.find("p", class_="star-rating")
+                        rating = parse_rating(rating_tag.get("class", [])) if rating_tag else 0
+
+                        products.append((title, price, rating, product_url))
                     except Exception:
-                        logging.exception("Failed to parse product page: %s", product_url)
-                        num_reviews = -1
+                        logging.exception("Failed to parse a product on %s", next_url)
+                        continue
+
+                # everything needed is extracted; break the tree's reference
+                # cycles now instead of waiting for the garbage collector
+                soup.decompose()
+
+                review_futures = []
+                if FETCH_PRODUCT_PAGES:
+                    # Fetch the product pages of this catalog page concurrently
+                    review_futures = [
+                        executor.submit(fetch_reviews, session, product_url)
+                        for _, _, _, product_url in products
+                    ]
+
+                rows_to_write = []
+                for i, (title, price, rating, product_url) in enumerate(products):
+                    num_reviews = review_futures[i].result() if review_futures else 0
+                    scraped_at = datetime.utcnow().isoformat() + "Z"
+                    # same order as fieldnames
+                    rows_to_write.append((title, price, rating, num_reviews, product_url, scraped_at))
+                    logging.info("Queued product: %s", title)
+
+                # Append page results to CSV as we go
+                try:
+                    writer.writerows(rows_to_write)
+                    # flush so the file never lags behind the checkpoint
+                    out.flush()
+                except Exception:
+                    logging.exception("Failed to write page results to %s", OUT_CSV)
                 else:
-                    logging.warning("Could not retrieve product page: %s", product_url)
-
-                # be polite between product requests
-                time.sleep(POLITE_DELAY)
-
-                scraped_at = datetime.utcnow().isoformat() + "Z"
-
-                row = {
-                    "title": title,
-                    "price": price,
-                    "rating": rating,
-                    "number_of_reviews": num_reviews,
-                    "product_page_url": product_url,
-                    "scraped_at": scraped_at,
-                }
-                rows_to_write.append(row)
-                logging.info("Queued product: %s", title)
-            except Exception:
-                logging.exception("Failed to parse a product on %s", next_url)
-                continue
-
-        # Append page results to CSV as we go
-        try:
-            with open(OUT_CSV, "a", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                for r in rows_to_write:
-                    writer.writerow(r)
-        except Exception:
-            logging.exception("Failed to write page results to %s", OUT_CSV)
-        else:
-            # user-visible feedback on progress
-            saved = len(rows_to_write)
-            print(f"Saved {saved} rows from page {page_count}")
-
-        # Save checkpoint (next page)
-        next_link = soup.select_one("li.next > a")
-        if next_link:
-            href = next_link.get("href")
-            # next pages on this site are relative to the catalog path
-            next_url = urljoin(next_url, href)
-            save_checkpoint({"next_url": next_url})
-            logging.info("Saved checkpoint for next page: %s", next_url)
-        else:
-            # finished
-            save_checkpoint({"next_url": None})
-            logging.info("No next page; finished crawling pages")
-            next_url = None
-
-    logging.info("Crawling finished. Deduplicating output CSV by title...")
-    deduplicate_csv(OUT_CSV, key_field="title", fieldnames=fieldnames)
-    logging.info("Done. Cleaned CSV saved to %s", OUT_CSV)
-
-
-def deduplicate_csv(path: str, key_field: str, fieldnames):
-    """Read CSV and deduplicate by `key_field`, keeping first occurrence."""
-    try:
-        seen = {}
-        with open(path, "r", newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                key = row.get(key_field)
-                if key and key not in seen:
-                    seen[key] = row
+                    # user-visible feedback on progress
+                    saved = len(rows_to_write)
+                    print(f"Saved {saved} rows from page {page_count}")
+
+                # Save checkpoint (next page) every CHECKPOINT_EVERY pages; pages
+                # redone after a crash are harmless since seen titles are skipped
+                next_url = following_url
+                pages_since_checkpoint += 1
+                if next_url:
+                    if pages_since_checkpoint >= CHECKPOINT_EVERY:
+                        save_checkpoint({"next_url": next_url})
+                        pages_since_checkpoint = 0
+                        logging.info("Saved checkpoint for next page: %s", next_url)
+                else:
+                    # finished
+                    save_checkpoint({"next_url": None})
+                    logging.info("No next page; finished crawling pages")
+        except BaseException:
+            # stop promptly on Ctrl-C or an error: drop the queued product
+            # fetches and the prefetched page, and release workers waiting
+            # on the rate limiter, instead of letting the executor's
+            # shutdown work through them at the polite pace
+            rate_limiter.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
 
-        # Overwrite CSV with deduped rows
-        with open(path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for row in seen.values():
-                writer.writerow(row)
-    except Exception:
-        logging.exception("Failed to deduplicate CSV %s", path)
+    logging.info("Crawling finished. Output saved to %s", OUT_CSV)
 
 
 if __name__ == "__main__":
@@ -283,10 +372,44 @@ if __name__ == "__main__":
     except Exception:
         logging.exception("Unhandled exception in scraper")
 import requests
-from bs4 import BeautifulSoup
+from urllib3.util.retry import Retry
+from lxml import etree
 import csv
 from urllib.parse import urljoin
 
+def collect_books(parser, books):
+    """
+    Append (title, price) for every book article the parser has finished
+    
+    Each article is cleared once read and everything parsed before it is
+    detached, so only the current article is kept in memory. Returns the
+    number of books added.
+    """
+    count = 0
+    for _, container in parser.read_events():
+        if 'product_pod' in container.get('class', ''):
+            # Extract title
+            title = container.find('.//h3/a').get('title')
+            
+            # Extract price
+            price = container.findtext(".//p[@class='price_color']").strip()
+            
+            books.append((title, price))
+            print(f"  - {title}: {price}")
+            count += 1
+        container.clear()
+        # Drop everything parsed before this article: at each level up to
+        # <body> its preceding siblings are finished, e.g. the <li> wrappers
+        # of earlier articles or the page header. The open ancestors
+        # themselves are left for the parser.
+        node = container
+        while node.tag != 'html' and node.getparent() is not None:
+            parent = node.getparent()
+            while node.getprevious() is not None:
+                del parent[0]
+            node = parent
+    return count
+
 def scrape_books(base_url="http://books.toscrape.com", output_file="books.csv"):
     """
     Scrape book titles and prices from books.toscrape.com
@@ -298,6 +421,14 @@ def scrape_books(base_url="http://books.toscrape.com", output_file="books.csv"):
     books = []
     page_num = 1
     
+    # Reuse one keep-alive connection for all catalog pages
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+    })
+    session.mount('http://', KeepAliveAdapter(pool_connections=4, pool_maxsize=16,
+                                             max_retries=Retry(total=3, backoff_factor=0.5)))
+    
     while True:
         # Construct the URL for the current page
         if page_num == 1:
@@ -308,39 +439,23 @@ def scrape_books(base_url="http://books.toscrape.com", output_file="books.csv"):
         try:
             print(f"Scraping page {page_num}: {url}")
             
-            # Fetch the page
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # Parse the HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find all book containers
-            book_containers = soup.find_all('article', class_='product_pod')
+            # Fetch the page and parse it while it streams in, handling
+            # each book article as soon as it is complete
+            with session.get(url, timeout=10, stream=True) as response:
+                response.raise_for_status()
+                
+                parser = etree.HTMLPullParser(events=('end',), tag='article')
+                book_count = 0
+                for chunk in response.iter_content(chunk_size=16384):
+                    parser.feed(chunk)
+                    book_count += collect_books(parser, books)
+                parser.close()
+                book_count += collect_books(parser, books)
             
-            if not book_containers:
+            if not book_count:
                 print(f"No books found on page {page_num}. Stopping.")
                 break
             
-            # Extract title and price from each book
-            for container in book_containers:
-                # Extract title
-                title_element = container.find('h3').find('a')
-                title = title_element['title']
-                
-                # Extract price
-                price_element = container.find('p', class_='price_color')
-                price = price_element.text.strip()
-                
-                books.append({
-                    'title': title,
-                    'price': price
-                })
-                print(f"  - {title}: {price}")
-            
             page_num += 1
             
         except requests.exceptions.RequestException as e:
@@ -351,10 +466,9 @@ def scrape_books(base_url="http://books.toscrape.com", output_file="books.csv"):
     if books:
         try:
             with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['title', 'price']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+                writer = csv.writer(csvfile)
                 
-                writer.writeheader()
+                writer.writerow(('title', 'price'))
                 writer.writerows(books)
             
             print(f"\n✓ Successfully scraped {len(books)} books")
@@ -1,7 +1,9 @@
 """
 zara_scraper.py
 Scrapes up to 30 products from a Zara search results page and saves to `zara_products.csv`.
-Uses Playwright for reliable JS rendering and automatic browser management.
+Asks Zara's JSON search API (the one the search page itself calls) first, which
+needs no browser. Falls back to rendering the page with Playwright if the API
+refuses the request or returns nothing usable.
 
 Usage:
   pip install -r requirements.txt
@@ -10,21 +12,39 @@ Usage:
   python zara_scraper.py
 
 Notes:
+ - Playwright is only needed for the browser fallback (`playwright install chromium`).
  - Respect Zara's robots.txt and terms of service before running repeatedly.
- - Script is polite: it scrolls slowly and includes delays.
+ - Script is polite: it makes a single API request, or scrolls at most a few times.
 """
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+import httpx
 import csv
-import time
-import random
+from urllib.parse import urlsplit
 
+SEARCH_TERM = "zara top gate"
+SECTION = "WOMAN"
 URL = "https://www.zara.com/es/en/search?searchTerm=zara%20top%20gate&section=WOMAN"
 TARGET = 30
 OUTPUT = "zara_products.csv"
+# Browser profile kept between runs so the HTTP cache and cookies survive
+PROFILE_DIR = ".zara_profile"
+USER_AGENT = ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/117.0 Safari/537.36")
 
-SCROLL_PAUSE = 1.0
-MAX_SCROLL_ATTEMPTS = 60
+# JSON endpoint behind the search page (10701 is the Spanish store)
+API_URL = "https://www.zara.com/itxrest/2/search/store/10701/query"
+API_PARAMS = {
+    "query": SEARCH_TERM,
+    "section": SECTION,
+    "locale": "en_GB",
+    "offset": 0,
+    "limit": TARGET,
+    "ajax": "true",
+}
+PRODUCT_URL = "https://www.zara.com/es/en/{keyword}-p{product_id}.html"
+
+MAX_SCROLLS = 5
+SCROLL_WAIT_MS = 6000  # per scroll, so at most 30s in total
 
 SELECTOR_CANDIDATES = [
     "article[data-qa-id='product']",
@@ -35,6 +55,14 @@ SELECTOR_CANDIDATES = [
     "div.product-card"
 ]
 
+# Never parsed by the scraper; image URLs are read from the <img> attributes,
+# which are set even when the download itself is aborted. Stylesheets are kept
+# because the grid layout drives lazy loading while scrolling.
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+# Only Zara's own site and static asset host are let through; everything else
+# (analytics, tag managers, ads) is aborted
+ALLOWED_HOSTS = ("zara.com", "zara.net")
+
 PRICE_SELECTORS = [
     ".price__amount",
     ".product-price",
@@ -42,127 +70,186 @@ PRICE_SELECTORS = [
 ]
 
 
-def extract_from_element(el):
-    # Try to get the product url
-    href = None
-    try:
-        a = el.query_selector("a[href]")
-        if a:
-            href = a.get_attribute("href")
-            if href and href.startswith("/"):
-                href = "https://www.zara.com" + href
-    except Exception:
-        href = None
+# Runs inside the browser and extracts every product card in one call,
+# instead of several query_selector/get_attribute round trips per card.
+EXTRACT_PRODUCTS_JS = """
+([selectors, priceSelectors]) => {
+    let elems = [];
+    for (const sel of selectors) {
+        elems = Array.from(document.querySelectorAll(sel));
+        if (elems.length > 0) break;
+    }
+    return elems.map(el => {
+        const a = el.querySelector("a[href]");
+        const img = el.querySelector("img");
+        // title: try alt, aria-label, or the first line of visible text
+        let title = (img && img.getAttribute("alt")) || el.getAttribute("aria-label");
+        if (!title) title = (el.innerText || "").split("\\n")[0];
+        let price = "";
+        for (const sel of priceSelectors) {
+            const p = el.querySelector(sel);
+            if (p && p.innerText.trim()) {
+                price = p.innerText.trim();
+                break;
+            }
+        }
+        return {
+            title: (title || "").trim(),
+            price: price,
+            url: a ? a.href : "",
+            image: img ? (img.getAttribute("src") || img.getAttribute("data-src")
+                          || img.getAttribute("data-lazy") || "") : ""
+        };
+    });
+}
+"""
 
-    # image
-    img = None
-    try:
-        i = el.query_selector("img")
-        if i:
-            img = i.get_attribute("src") or i.get_attribute("data-src") or i.get_attribute("data-lazy")
-    except Exception:
-        img = None
 
-    # title: try alt, aria-label, or visible text
-    title = None
+# True once the cards extract_products would read (those of the first
+# selector with any match) link to at least `target` distinct product URLs
+ENOUGH_PRODUCTS_JS = """
+([selectors, target]) => {
+    for (const sel of selectors) {
+        const elems = document.querySelectorAll(sel);
+        if (elems.length === 0) continue;
+        const urls = new Set();
+        for (const el of elems) {
+            const a = el.querySelector("a[href]");
+            if (a) urls.add(a.href);
+        }
+        return urls.size >= target;
+    }
+    return false;
+}
+"""
+
+
+def extract_products(page):
     try:
-        if i:
-            title = i.get_attribute("alt")
-        if not title:
-            title = el.get_attribute("aria-label")
-        if not title:
-            text = el.inner_text()
-            if text:
-                # first line is often the title
-                title = text.splitlines()[0]
+        return page.evaluate(EXTRACT_PRODUCTS_JS, [SELECTOR_CANDIDATES, PRICE_SELECTORS])
     except Exception:
-        title = title or ""
-
-    # price
-    price = ""
-    for sel in PRICE_SELECTORS:
-        try:
-            p = el.query_selector(sel)
-            if p:
-                price = p.inner_text().strip()
-                if price:
-                    break
-        except Exception:
-            continue
+        return []
+
 
+def parse_api_product(item):
+    # search results wrap each product in a "content" object
+    product = item.get("content") or item
+    seo = product.get("seo") or {}
+    price = product.get("price")
+    if isinstance(price, dict):
+        price = price.get("value")
+    if isinstance(price, int):
+        # the API reports prices in cents
+        price = f"{price / 100:.2f}"
+    media = product.get("xmedia") or []
+    url = ""
+    if seo.get("keyword"):
+        url = PRODUCT_URL.format(keyword=seo["keyword"],
+                                 product_id=seo.get("seoProductId") or product.get("id", ""))
     return {
-        "title": (title or "").strip(),
-        "price": price,
-        "url": href or "",
-        "image": img or ""
+        "title": (product.get("name") or product.get("title") or "").strip(),
+        "price": "" if price is None else str(price),
+        "url": url,
+        "image": media[0].get("url", "") if media else ""
     }
 
 
-def find_elements(page):
-    for sel in SELECTOR_CANDIDATES:
-        try:
-            elems = page.query_selector_all(sel)
-            if elems and len(elems) > 0:
-                return elems
-        except Exception:
-            continue
-    return []
+def fetch_from_api():
+    """Return products from the JSON search API, or None to use the browser instead."""
+    headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
+    try:
+        with httpx.Client(http2=True, headers=headers, timeout=15) as client:
+            resp = client.get(API_URL, params=API_PARAMS)
+        if resp.status_code == 403:
+            print("Search API refused the request (403)")
+            return None
+        resp.raise_for_status()
+        data = resp.json()
+        results = (data.get("results") if isinstance(data, dict) else None) or []
+    except (httpx.HTTPError, ValueError) as e:
+        print(f"Search API request failed: {e}")
+        return None
 
+    products = {}
+    for item in results:
+        info = parse_api_product(item)
+        if info["url"] and info["url"] not in products:
+            products[info["url"]] = info
+            print(f"Found ({len(products)}) - {info['title']} - {info['price']}")
+            if len(products) >= TARGET:
+                break
+    return products or None
+
+
+def is_allowed_host(url):
+    host = urlsplit(url).hostname
+    if host is None:
+        # data: and blob: URLs never leave the browser
+        return True
+    return any(host == allowed or host.endswith("." + allowed) for allowed in ALLOWED_HOSTS)
+
+
+def block_heavy_resources(route):
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or not is_allowed_host(request.url):
+        route.abort()
+    else:
+        route.continue_()
+
+
+def scrape_with_browser():
+    # imported here so the API path works without Playwright installed
+    from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 
-def run():
     products = {}
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(user_agent=("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-                                                   "(KHTML, like Gecko) Chrome/117.0 Safari/537.36"))
-        page = context.new_page()
+        context = p.chromium.launch_persistent_context(PROFILE_DIR, headless=True, user_agent=USER_AGENT)
+        context.route("**/*", block_heavy_resources)
+        # a persistent context starts with one blank page already open
+        page = context.pages[0] if context.pages else context.new_page()
         page.set_default_timeout(15000)
         print("Loading page...")
-        page.goto(URL)
+        page.goto(URL, wait_until="domcontentloaded")
 
-        scroll_attempts = 0
-        last_count = 0
-        while len(products) < TARGET and scroll_attempts < MAX_SCROLL_ATTEMPTS:
-            # Wait for product cards to appear
+        # Scroll to the bottom a few times to trigger lazy loading, waiting in
+        # the browser after each scroll until enough cards are on the page,
+        # then extract them in a single pass
+        for _ in range(MAX_SCROLLS):
+            page.evaluate("() => window.scrollTo(0, document.body.scrollHeight)")
             try:
-                page.wait_for_timeout(500)
+                page.wait_for_function(ENOUGH_PRODUCTS_JS, arg=[SELECTOR_CANDIDATES, TARGET],
+                                       timeout=SCROLL_WAIT_MS)
             except PlaywrightTimeout:
                 pass
 
-            elems = find_elements(page)
-            for el in elems:
-                try:
-                    info = extract_from_element(el)
-                    if info["url"] and info["url"] not in products:
-                        products[info["url"]] = info
-                        print(f"Found ({len(products)}) - {info['title']} - {info['price']}")
-                        if len(products) >= TARGET:
-                            break
-                except Exception:
-                    continue
-
-            # If not enough products yet, scroll further
+            for info in extract_products(page):
+                if info["url"] and info["url"] not in products:
+                    products[info["url"]] = info
+                    print(f"Found ({len(products)}) - {info['title']} - {info['price']}")
+                    if len(products) >= TARGET:
+                        break
+
             if len(products) >= TARGET:
                 break
 
-            scroll_attempts += 1
-            page.evaluate("() => window.scrollBy(0, window.innerHeight)")
-            # small random delay to reduce load
-            time.sleep(SCROLL_PAUSE + random.random() * 0.8)
-
-            # if no new items after a few attempts, try clicking 'load more' style buttons
-            if len(products) == last_count:
-                # try click a 'show more' if exists
-                try:
-                    btn = page.query_selector("button[data-qa-id='load-more']") or page.query_selector("button.load-more")
-                    if btn:
-                        btn.click()
-                        time.sleep(1)
-                except Exception:
-                    pass
-            last_count = len(products)
-
-        browser.close()
+            # try click a 'show more' if exists
+            try:
+                btn = page.query_selector("button[data-qa-id='load-more']") or page.query_selector("button.load-more")
+                if btn:
+                    btn.click()
+            except Exception:
+                pass
+
+        context.close()
+
+    return products
+
+
+def run():
+    products = fetch_from_api()
+    if products is None:
+        print("Falling back to the browser...")
+        products = scrape_with_browser()
 
     # write CSV
     items = list(products.values())[:TARGET]